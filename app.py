@@ -2,8 +2,16 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import numpy as np
+import os
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import threading
+import contextlib
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # Page configuration
 st.set_page_config(
@@ -35,27 +43,566 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Load data
-@st.cache_data
-def load_data():
-    try:
-        df = pd.read_csv('src/data/Superstore.csv', encoding='utf-8')
-    except:
-        df = pd.read_csv('src/data/Superstore.csv', encoding='latin-1')
+DATA_CSV_PATH = 'src/data/Superstore.csv'
+DATA_PARQUET_PATH = 'src/data/Superstore.parquet'
+
+# Explicit schema for the CSV read: low-cardinality text as categoricals and
+# Quantity downcast. The float columns stay float64, as float32 drops the
+# fourth decimal of Sales and Profit and sums then drift at the cent
+CSV_DTYPES = {
+    'Region': 'category',
+    'Category': 'category',
+    'Segment': 'category',
+    'State': 'category',
+    'Ship Mode': 'category',
+    'Sub-Category': 'category',
+    'City': 'category',
+    'Sales': 'float64',
+    'Profit': 'float64',
+    'Discount': 'float64',
+    'Quantity': 'int32',
+}
+
+def _csv_encoding(path):
+    # The pyarrow engine passes undecodable bytes through instead of raising,
+    # so check once up front whether the file is valid UTF-8
+    with open(path, 'rb') as f:
+        try:
+            f.read().decode('utf-8')
+        except UnicodeDecodeError:
+            return 'latin-1'
+    return 'utf-8'
+
+def _parse_dates(column):
+    # Only ~1.3k distinct dates, so parse each once and expand by code
+    codes, uniques = pd.factorize(column)
+    parsed = pd.to_datetime(uniques, format='%d/%m/%Y')
+    return pd.Series(parsed.take(codes), index=column.index, name=column.name)
+
+def _prepare_data():
+    df = pd.read_csv(
+        DATA_CSV_PATH,
+        engine='pyarrow',
+        encoding=_csv_encoding(DATA_CSV_PATH),
+        dtype=CSV_DTYPES
+    )
     
     # Convert date columns
-    df['Order Date'] = pd.to_datetime(df['Order Date'], format='%d/%m/%Y')
-    df['Ship Date'] = pd.to_datetime(df['Ship Date'], format='%d/%m/%Y')
+    df['Order Date'] = _parse_dates(df['Order Date'])
+    df['Ship Date'] = _parse_dates(df['Ship Date'])
     
     # Add derived columns
-    df['Year'] = df['Order Date'].dt.year
-    df['Month'] = df['Order Date'].dt.month
-    df['Month-Year'] = df['Order Date'].dt.to_period('M')
-    df['Profit Margin'] = (df['Profit'] / df['Sales']) * 100
+    df['Year'] = df['Order Date'].dt.year.astype('int16')
+    df['Month'] = df['Order Date'].dt.month.astype('int8')
+    months = df['Order Date'].values.astype('datetime64[M]')
+    df['Month-Year'] = pd.Categorical(np.datetime_as_string(months, unit='M'))
+    df['MonthYearInt'] = months.astype('int32')
+    df['Profit Margin'] = np.divide(
+        df['Profit'].values, df['Sales'].values,
+        out=np.zeros(len(df)), where=df['Sales'].values != 0
+    ) * 100
+    df['Shipping Days'] = (df['Ship Date'] - df['Order Date']).dt.days.astype('int16')
+    df['OrderCode'] = pd.factorize(df['Order ID'])[0].astype('int32')
+    df['CustomerCode'] = pd.factorize(df['Customer ID'])[0].astype('int32')
+    df['Location'] = (df['City'].astype(str) + ', ' + df['State'].astype(str)).astype('category')
     
     return df
 
-# Load the data
-df = load_data()
+def _parquet_is_fresh():
+    # The Parquet copy is stale if the CSV or the column derivations in this
+    # script have changed since it was written
+    if not os.path.exists(DATA_PARQUET_PATH):
+        return False
+    source_mtime = max(os.path.getmtime(DATA_CSV_PATH), os.path.getmtime(__file__))
+    return os.path.getmtime(DATA_PARQUET_PATH) >= source_mtime
+
+def _write_parquet(df):
+    # Write next to the target and swap it in, so a crash mid-write never
+    # leaves a truncated file that would pass the freshness check
+    tmp_path = f'{DATA_PARQUET_PATH}.{os.getpid()}.tmp'
+    try:
+        df.to_parquet(tmp_path, compression='zstd')
+        os.replace(tmp_path, DATA_PARQUET_PATH)
+    except OSError:
+        # Data directory is read-only, keep serving from the parsed CSV
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+
+# The frame is never mutated after loading, so it is held as one shared
+# cache_resource object; st.cache_data would hand every caller its own
+# unpickled copy of the whole dataset
+@st.cache_resource
+def load_data():
+    if _parquet_is_fresh():
+        try:
+            return pd.read_parquet(DATA_PARQUET_PATH, engine='pyarrow')
+        except (OSError, ValueError):
+            # Unreadable copy, e.g. left by an interrupted write, rebuild it
+            pass
+    df = _prepare_data()
+    _write_parquet(df)
+    return df
+
+@st.cache_data
+def load_options():
+    # Sidebar choices, computed once here rather than on every rerun
+    df = load_data()
+    return {
+        'date_min': df['Order Date'].min(),
+        'date_max': df['Order Date'].max(),
+        'regions': tuple(df['Region'].cat.categories),
+        'categories': tuple(df['Category'].cat.categories),
+        'segments': tuple(df['Segment'].cat.categories),
+        'states': tuple(sorted(df['State'].cat.categories)),
+    }
+
+# Load the sidebar options, the helpers below read the frame itself
+options = load_options()
+
+# Filtering and aggregations
+def category_mask(column, values):
+    # Match on the integer category codes rather than the string values
+    codes = np.flatnonzero(column.cat.categories.isin(values))
+    return np.isin(column.cat.codes.values, codes)
+
+def top_k(values, k):
+    # Positions of the k largest values in descending order, ties broken by
+    # position like nlargest(keep='first'). np.partition finds the k-th
+    # largest in linear time, so only the candidates at or above it are sorted
+    values = np.asarray(values)
+    if len(values) > k:
+        idx = np.flatnonzero(values >= np.partition(values, -k)[-k])
+    else:
+        idx = np.arange(len(values))
+    return idx[np.argsort(-values[idx], kind='stable')][:k]
+
+def sorted_group_sums(keys, values):
+    # Sum each run of equal keys in one np.add.reduceat pass, keys must
+    # already be sorted
+    bounds = np.flatnonzero(np.diff(keys, prepend=keys[:1] - 1))
+    return keys[bounds], np.add.reduceat(values, bounds, axis=0)
+
+def count_distinct(df, keys, code):
+    # Distinct ids per group: dedupe the integer id codes, then count rows
+    return df.drop_duplicates(keys + [code]).groupby(keys, observed=True).size()
+
+# Each helper is keyed on the hashable filter tuple, so reruns triggered by
+# unrelated widgets reuse the cached results instead of rescanning the data.
+# The date picker and multiselects allow effectively unbounded filter states,
+# so every per-filter cache keeps at most 32 entries, like the figures.
+@st.cache_data(max_entries=32)
+def filter_mask(date_lo, date_hi, regions, categories, segments, states):
+    df = load_data()
+    masks = [
+        (df['Order Date'] >= date_lo).values,
+        (df['Order Date'] <= date_hi).values,
+        category_mask(df['Region'], regions),
+        category_mask(df['Category'], categories),
+        category_mask(df['Segment'], segments),
+    ]
+
+    if states:
+        masks.append(category_mask(df['State'], states))
+
+    return np.logical_and.reduce(masks)
+
+@st.cache_data(max_entries=32)
+def apply_filters(date_lo, date_hi, regions, categories, segments, states):
+    df = load_data()
+    return df[filter_mask(date_lo, date_hi, regions, categories, segments, states)]
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def key_metrics(filters):
+    filtered_df = apply_filters(*filters)
+    return {
+        'total_sales': filtered_df['Sales'].sum(),
+        'total_profit': filtered_df['Profit'].sum(),
+        'total_orders': np.count_nonzero(np.bincount(filtered_df['OrderCode'].values)),
+        'avg_profit_margin': filtered_df['Profit Margin'].mean(),
+    }
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def monthly_agg(filters):
+    filtered_df = apply_filters(*filters)
+    # Stable-sort the rows by month so each month is one run for reduceat
+    month_keys = filtered_df['MonthYearInt'].values
+    order = np.argsort(month_keys, kind='stable')
+    months, sums = sorted_group_sums(
+        month_keys[order],
+        filtered_df[['Sales', 'Profit']].to_numpy()[order]
+    )
+    orders = count_distinct(filtered_df, ['MonthYearInt'], 'OrderCode')
+    # Months since the epoch back to 'YYYY-MM' labels for the x axis
+    return pd.DataFrame({
+        'Month-Year': np.datetime_as_string(months.astype('datetime64[M]'), unit='M'),
+        'Sales': sums[:, 0],
+        'Profit': sums[:, 1],
+        'Order ID': orders.values
+    })
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def category_agg(filters):
+    filtered_df = apply_filters(*filters)
+    return filtered_df.groupby('Category', observed=True)['Sales'].sum().reset_index()
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def region_agg(filters):
+    filtered_df = apply_filters(*filters)
+    return filtered_df.groupby('Region', observed=True)['Sales'].sum().reset_index()
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def state_agg(filters):
+    filtered_df = apply_filters(*filters)
+    state_sales = filtered_df.groupby('State', observed=True)['Sales'].sum().reset_index()
+    return state_sales.iloc[top_k(state_sales['Sales'], 10)]
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def segment_agg(filters):
+    filtered_df = apply_filters(*filters)
+    segment_data = filtered_df.groupby('Segment', observed=True).agg({
+        'Sales': 'sum',
+        'Profit': 'sum'
+    })
+    segment_data['Order ID'] = count_distinct(filtered_df, ['Segment'], 'OrderCode')
+    return segment_data.reset_index()
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def product_agg(filters):
+    filtered_df = apply_filters(*filters)
+    product_sales = filtered_df.groupby('Product Name', observed=True)['Sales'].sum()
+    return product_sales.iloc[top_k(product_sales, 10)].reset_index()
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def subcat_agg(filters):
+    filtered_df = apply_filters(*filters)
+    subcat_data = filtered_df.groupby('Sub-Category', observed=True).agg({
+        'Sales': 'sum',
+        'Profit': 'sum'
+    }).reset_index()
+    subcat_data['Profit Margin'] = (subcat_data['Profit'] / subcat_data['Sales']) * 100
+    return subcat_data
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def ship_mode_agg(filters):
+    filtered_df = apply_filters(*filters)
+    ship_mode_data = count_distinct(filtered_df, ['Ship Mode'], 'OrderCode').rename('Order ID').to_frame()
+    ship_mode_data['Sales'] = filtered_df.groupby('Ship Mode', observed=True)['Sales'].sum()
+    return ship_mode_data.reset_index()
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def ship_time_agg(filters):
+    filtered_df = apply_filters(*filters)
+    return filtered_df.groupby('Ship Mode', observed=True)['Shipping Days'].mean().reset_index()
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def customer_agg(filters):
+    filtered_df = apply_filters(*filters)
+    customer_sales = filtered_df.groupby('Customer Name', observed=True)['Sales'].sum()
+    return customer_sales.iloc[top_k(customer_sales, 10)].reset_index()
+
+@st.cache_data
+def customer_segment_region():
+    # Customers per (Segment, Region) over the whole dataset, built from the
+    # distinct customer triples rather than a nunique over every row
+    df = load_data()
+    return count_distinct(df, ['Segment', 'Region'], 'CustomerCode').reset_index(name='Customer ID')
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def customer_dist_agg(filters):
+    date_lo, date_hi, regions, categories, segments, states = filters
+    # Only Segment and Region narrowed, so the precomputed table applies
+    if (date_lo <= options['date_min'] and date_hi >= options['date_max'] and
+            set(categories) >= set(options['categories']) and not states):
+        customer_dist = customer_segment_region()
+        keep = category_mask(customer_dist['Segment'], segments) & category_mask(customer_dist['Region'], regions)
+        return customer_dist[keep].reset_index(drop=True)
+    filtered_df = apply_filters(*filters)
+    return count_distinct(filtered_df, ['Segment', 'Region'], 'CustomerCode').reset_index(name='Customer ID')
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def city_agg(filters):
+    filtered_df = apply_filters(*filters)
+    city_data = filtered_df.groupby('Location', observed=True).agg({
+        'Sales': 'sum',
+        'Profit': 'sum'
+    })
+    city_data['Order ID'] = count_distinct(filtered_df, ['Location'], 'OrderCode')
+    city_data = city_data.reset_index()
+
+    # Top cities by sales
+    return city_data.iloc[top_k(city_data['Sales'], 15)]
+
+@st.cache_data(max_entries=32)
+def export_agg(filters):
+    filtered_df = apply_filters(*filters)
+    agg_data = filtered_df.groupby(['Category', 'Sub-Category', 'Region'], observed=True).agg({
+        'Sales': 'sum',
+        'Profit': 'sum',
+        'Quantity': 'sum'
+    })
+    agg_data['Order ID'] = count_distinct(filtered_df, ['Category', 'Sub-Category', 'Region'], 'OrderCode')
+    return agg_data.reset_index()
+
+# The chart aggregations are independent once the filtered frame exists,
+# and pandas/NumPy release the GIL in their C loops, so a cold filter state
+# fills their caches from a thread pool. The prefetch is itself memoised per
+# filter state like the figures, so warm reruns skip it entirely. The chart
+# helpers show no spinners of their own, the caller wraps the whole prefetch
+# in a single st.spinner on the script thread instead
+CHART_AGGREGATIONS = [
+    key_metrics, monthly_agg, category_agg, region_agg, state_agg, segment_agg,
+    product_agg, subcat_agg, ship_mode_agg, ship_time_agg, customer_agg,
+    customer_dist_agg, city_agg
+]
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def prefetch_aggregations(filters):
+    # Shared inputs first, so the workers don't race to build the same entry
+    apply_filters(*filters)
+    workers = min(8, os.cpu_count() or 1)
+    if workers < 2:
+        # A single core gains nothing from the pool but its overhead
+        for agg in CHART_AGGREGATIONS:
+            agg(filters)
+        return
+    # Workers run under this script's context, so the cached helpers they
+    # call don't warn about a missing ScriptRunContext
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(
+        max_workers=workers,
+        initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx)
+    ) as executor:
+        list(executor.map(lambda agg: agg(filters), CHART_AGGREGATIONS))
+
+# Download payloads are passed to st.download_button as callables, so they
+# are only serialized when a button is clicked, once per filter state
+INTERNAL_COLUMNS = ['MonthYearInt', 'OrderCode', 'CustomerCode', 'Location']
+
+def to_csv_bytes(frame):
+    # PyArrow's multi-threaded CSV writer, with the date columns written as
+    # plain dates to match the pandas output
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    for i, field in enumerate(table.schema):
+        if pa.types.is_timestamp(field.type):
+            table = table.set_column(i, field.name, pc.cast(table[i], pa.date32()))
+    buf = pa.BufferOutputStream()
+    pacsv.write_csv(table, buf)
+    return buf.getvalue().to_pybytes()
+
+@st.cache_data(max_entries=32)
+def filtered_csv(filters):
+    return to_csv_bytes(apply_filters(*filters).drop(columns=INTERNAL_COLUMNS))
+
+@st.cache_data(max_entries=32)
+def summary_csv(filters):
+    # Small mixed-type table (stat names, dates and numbers), left to pandas
+    export_df = apply_filters(*filters).drop(columns=INTERNAL_COLUMNS)
+    return export_df.describe().to_csv().encode()
+
+@st.cache_data(max_entries=32)
+def aggregated_csv(filters):
+    return to_csv_bytes(export_agg(filters))
+
+@st.cache_data(max_entries=32)
+def filter_preview(filters, n=100):
+    # Take the first n matching rows straight from the mask, without
+    # materializing the whole filtered frame
+    df = load_data()
+    idx = np.flatnonzero(filter_mask(*filters))[:n]
+    return df.iloc[idx].drop(columns=INTERNAL_COLUMNS)
+
+# Charts
+# Figures are memoised per filter state, so an unchanged selection reuses the
+# built Figure objects instead of rebuilding traces and layouts on every rerun
+@st.cache_resource(max_entries=32)
+def trend_chart(filters):
+    monthly_sales = monthly_agg(filters)
+
+    fig_trend = go.Figure()
+    fig_trend.add_trace(go.Scattergl(
+        x=monthly_sales['Month-Year'],
+        y=monthly_sales['Sales'],
+        mode='lines+markers',
+        name='Sales',
+        line=dict(color='#1f77b4', width=3)
+    ))
+    fig_trend.add_trace(go.Scattergl(
+        x=monthly_sales['Month-Year'],
+        y=monthly_sales['Profit'],
+        mode='lines+markers',
+        name='Profit',
+        yaxis='y2',
+        line=dict(color='#ff7f0e', width=3)
+    ))
+
+    fig_trend.update_layout(
+        title="Sales and Profit Trends",
+        xaxis_title="Month-Year",
+        yaxis=dict(title="Sales ($)", side="left"),
+        yaxis2=dict(title="Profit ($)", side="right", overlaying="y"),
+        hovermode='x unified',
+        height=400
+    )
+    return fig_trend
+
+@st.cache_resource(max_entries=32)
+def category_chart(filters):
+    category_sales = category_agg(filters)
+    fig_cat = px.pie(
+        category_sales, 
+        values='Sales', 
+        names='Category',
+        color_discrete_sequence=px.colors.qualitative.Set3
+    )
+    fig_cat.update_traces(textposition='inside', textinfo='percent+label')
+    return fig_cat
+
+@st.cache_resource(max_entries=32)
+def region_chart(filters):
+    region_sales = region_agg(filters)
+    fig_region = px.bar(
+        region_sales, 
+        x='Region', 
+        y='Sales',
+        color='Sales',
+        color_continuous_scale='Blues'
+    )
+    fig_region.update_layout(showlegend=False, uirevision='constant')
+    return fig_region
+
+@st.cache_resource(max_entries=32)
+def state_chart(filters):
+    top_states = state_agg(filters)
+    fig_states = px.bar(
+        top_states, 
+        x='Sales', 
+        y='State',
+        orientation='h',
+        color='Sales',
+        color_continuous_scale='Viridis'
+    )
+    fig_states.update_layout(showlegend=False, height=400, uirevision='constant')
+    return fig_states
+
+@st.cache_resource(max_entries=32)
+def segment_chart(filters):
+    segment_data = segment_agg(filters)
+
+    fig_segment = go.Figure()
+    fig_segment.add_trace(go.Bar(
+        name='Sales',
+        x=segment_data['Segment'],
+        y=segment_data['Sales'],
+        marker_color='lightblue'
+    ))
+    fig_segment.add_trace(go.Bar(
+        name='Profit',
+        x=segment_data['Segment'],
+        y=segment_data['Profit'],
+        marker_color='orange'
+    ))
+    fig_segment.update_layout(barmode='group', height=400, uirevision='constant')
+    return fig_segment
+
+@st.cache_resource(max_entries=32)
+def product_chart(filters):
+    top_products = product_agg(filters)
+    fig_top_products = px.bar(
+        top_products, 
+        x='Sales', 
+        y='Product Name',
+        orientation='h',
+        color='Sales',
+        color_continuous_scale='Blues'
+    )
+    fig_top_products.update_layout(showlegend=False, height=400, uirevision='constant')
+    return fig_top_products
+
+@st.cache_resource(max_entries=32)
+def subcat_chart(filters):
+    subcat_data = subcat_agg(filters)
+
+    fig_subcat = px.scatter(
+        subcat_data, 
+        x='Sales', 
+        y='Profit',
+        size='Sales',
+        color='Profit Margin',
+        hover_name='Sub-Category',
+        color_continuous_scale='RdYlBu',
+        render_mode='webgl'
+    )
+    fig_subcat.update_layout(height=400)
+    return fig_subcat
+
+@st.cache_resource(max_entries=32)
+def ship_mode_chart(filters):
+    ship_mode_data = ship_mode_agg(filters)
+
+    fig_ship = px.pie(
+        ship_mode_data, 
+        values='Order ID', 
+        names='Ship Mode',
+        title="Orders by Ship Mode"
+    )
+    return fig_ship
+
+@st.cache_resource(max_entries=32)
+def ship_time_chart(filters):
+    ship_time = ship_time_agg(filters)
+
+    fig_ship_time = px.bar(
+        ship_time, 
+        x='Ship Mode', 
+        y='Shipping Days',
+        color='Shipping Days',
+        color_continuous_scale='Reds',
+        title="Average Shipping Days by Mode"
+    )
+    fig_ship_time.update_layout(uirevision='constant')
+    return fig_ship_time
+
+@st.cache_resource(max_entries=32)
+def customer_chart(filters):
+    customer_sales = customer_agg(filters)
+    fig_customers = px.bar(
+        customer_sales, 
+        x='Sales', 
+        y='Customer Name',
+        orientation='h',
+        color='Sales',
+        color_continuous_scale='Greens',
+        title="Top 10 Customers by Sales"
+    )
+    fig_customers.update_layout(showlegend=False, height=400, uirevision='constant')
+    return fig_customers
+
+@st.cache_resource(max_entries=32)
+def customer_dist_chart(filters):
+    customer_dist = customer_dist_agg(filters)
+    fig_cust_dist = px.sunburst(
+        customer_dist, 
+        path=['Segment', 'Region'], 
+        values='Customer ID',
+        title="Customer Distribution"
+    )
+    return fig_cust_dist
+
+@st.cache_resource(max_entries=32)
+def city_chart(filters):
+    top_cities = city_agg(filters)
+
+    fig_cities = px.bar(
+        top_cities, 
+        x='Sales', 
+        y='Location',
+        orientation='h',
+        color='Profit',
+        color_continuous_scale='RdYlGn',
+        title="Top 15 Cities by Sales"
+    )
+    fig_cities.update_layout(height=500, uirevision='constant')
+    return fig_cities
 
 # Header
 st.markdown('<h1 class="main-header">📊 Superstore Sales Dashboard</h1>', unsafe_allow_html=True)
@@ -66,71 +613,70 @@ st.sidebar.header("🔍 Filters")
 # Date range filter
 date_range = st.sidebar.date_input(
     "Select Date Range",
-    value=(df['Order Date'].min(), df['Order Date'].max()),
-    min_value=df['Order Date'].min(),
-    max_value=df['Order Date'].max()
+    value=(options['date_min'], options['date_max']),
+    min_value=options['date_min'],
+    max_value=options['date_max']
 )
 
 # Region filter
 regions = st.sidebar.multiselect(
     "Select Region(s)",
-    options=df['Region'].unique(),
-    default=df['Region'].unique()
+    options=options['regions'],
+    default=options['regions']
 )
 
 # Category filter
 categories = st.sidebar.multiselect(
     "Select Category(ies)",
-    options=df['Category'].unique(),
-    default=df['Category'].unique()
+    options=options['categories'],
+    default=options['categories']
 )
 
 # Segment filter
 segments = st.sidebar.multiselect(
     "Select Segment(s)",
-    options=df['Segment'].unique(),
-    default=df['Segment'].unique()
+    options=options['segments'],
+    default=options['segments']
 )
 
 # State filter
 states = st.sidebar.multiselect(
     "Select State(s)",
-    options=sorted(df['State'].unique()),
+    options=options['states'],
     default=[]
 )
 
 # Apply filters
-filtered_df = df[
-    (df['Order Date'] >= pd.to_datetime(date_range[0])) &
-    (df['Order Date'] <= pd.to_datetime(date_range[1])) &
-    (df['Region'].isin(regions)) &
-    (df['Category'].isin(categories)) &
-    (df['Segment'].isin(segments))
-]
-
-if states:
-    filtered_df = filtered_df[filtered_df['State'].isin(states)]
+filters = (
+    pd.to_datetime(date_range[0]),
+    pd.to_datetime(date_range[1]),
+    tuple(regions),
+    tuple(categories),
+    tuple(segments),
+    tuple(states),
+)
+record_count = int(np.count_nonzero(filter_mask(*filters)))
 
 # Main dashboard
-if not filtered_df.empty:
+if record_count:
+    with st.spinner("Loading dashboard..."):
+        prefetch_aggregations(filters)
+
     # Key metrics
+    metrics = key_metrics(filters)
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_sales = filtered_df['Sales'].sum()
-        st.metric("💰 Total Sales", f"${total_sales:,.2f}")
+        st.metric("💰 Total Sales", f"${metrics['total_sales']:,.2f}")
     
     with col2:
-        total_profit = filtered_df['Profit'].sum()
-        st.metric("📈 Total Profit", f"${total_profit:,.2f}")
+        st.metric("📈 Total Profit", f"${metrics['total_profit']:,.2f}")
     
     with col3:
-        total_orders = filtered_df['Order ID'].nunique()
-        st.metric("📦 Total Orders", f"{total_orders:,}")
+        st.metric("📦 Total Orders", f"{metrics['total_orders']:,}")
     
     with col4:
-        avg_profit_margin = filtered_df['Profit Margin'].mean()
-        st.metric("📊 Avg Profit Margin", f"{avg_profit_margin:.2f}%")
+        st.metric("📊 Avg Profit Margin", f"{metrics['avg_profit_margin']:.2f}%")
 
     st.markdown("---")
 
@@ -138,39 +684,7 @@ if not filtered_df.empty:
     st.subheader("📈 Sales Trends Over Time")
     
     # Monthly sales trend
-    monthly_sales = filtered_df.groupby('Month-Year').agg({
-        'Sales': 'sum',
-        'Profit': 'sum',
-        'Order ID': 'nunique'
-    }).reset_index()
-    monthly_sales['Month-Year'] = monthly_sales['Month-Year'].astype(str)
-    
-    fig_trend = go.Figure()
-    fig_trend.add_trace(go.Scatter(
-        x=monthly_sales['Month-Year'],
-        y=monthly_sales['Sales'],
-        mode='lines+markers',
-        name='Sales',
-        line=dict(color='#1f77b4', width=3)
-    ))
-    fig_trend.add_trace(go.Scatter(
-        x=monthly_sales['Month-Year'],
-        y=monthly_sales['Profit'],
-        mode='lines+markers',
-        name='Profit',
-        yaxis='y2',
-        line=dict(color='#ff7f0e', width=3)
-    ))
-    
-    fig_trend.update_layout(
-        title="Sales and Profit Trends",
-        xaxis_title="Month-Year",
-        yaxis=dict(title="Sales ($)", side="left"),
-        yaxis2=dict(title="Profit ($)", side="right", overlaying="y"),
-        hovermode='x unified',
-        height=400
-    )
-    st.plotly_chart(fig_trend, use_container_width=True)
+    st.plotly_chart(trend_chart(filters), use_container_width=True)
 
     # Charts row 1
     col1, col2 = st.columns(2)
@@ -178,29 +692,12 @@ if not filtered_df.empty:
     with col1:
         # Sales by Category
         st.subheader("🏷️ Sales by Category")
-        category_sales = filtered_df.groupby('Category')['Sales'].sum().reset_index()
-        fig_cat = px.pie(
-            category_sales, 
-            values='Sales', 
-            names='Category',
-            color_discrete_sequence=px.colors.qualitative.Set3
-        )
-        fig_cat.update_traces(textposition='inside', textinfo='percent+label')
-        st.plotly_chart(fig_cat, use_container_width=True)
+        st.plotly_chart(category_chart(filters), use_container_width=True)
     
     with col2:
         # Sales by Region
         st.subheader("🌍 Sales by Region")
-        region_sales = filtered_df.groupby('Region')['Sales'].sum().reset_index()
-        fig_region = px.bar(
-            region_sales, 
-            x='Region', 
-            y='Sales',
-            color='Sales',
-            color_continuous_scale='Blues'
-        )
-        fig_region.update_layout(showlegend=False)
-        st.plotly_chart(fig_region, use_container_width=True)
+        st.plotly_chart(region_chart(filters), use_container_width=True)
 
     # Charts row 2
     col1, col2 = st.columns(2)
@@ -208,43 +705,12 @@ if not filtered_df.empty:
     with col1:
         # Top 10 States by Sales
         st.subheader("🏛️ Top 10 States by Sales")
-        state_sales = filtered_df.groupby('State')['Sales'].sum().reset_index()
-        top_states = state_sales.nlargest(10, 'Sales')
-        fig_states = px.bar(
-            top_states, 
-            x='Sales', 
-            y='State',
-            orientation='h',
-            color='Sales',
-            color_continuous_scale='Viridis'
-        )
-        fig_states.update_layout(showlegend=False, height=400)
-        st.plotly_chart(fig_states, use_container_width=True)
+        st.plotly_chart(state_chart(filters), use_container_width=True)
     
     with col2:
         # Segment Analysis
         st.subheader("👥 Customer Segment Analysis")
-        segment_data = filtered_df.groupby('Segment').agg({
-            'Sales': 'sum',
-            'Profit': 'sum',
-            'Order ID': 'nunique'
-        }).reset_index()
-        
-        fig_segment = go.Figure()
-        fig_segment.add_trace(go.Bar(
-            name='Sales',
-            x=segment_data['Segment'],
-            y=segment_data['Sales'],
-            marker_color='lightblue'
-        ))
-        fig_segment.add_trace(go.Bar(
-            name='Profit',
-            x=segment_data['Segment'],
-            y=segment_data['Profit'],
-            marker_color='orange'
-        ))
-        fig_segment.update_layout(barmode='group', height=400)
-        st.plotly_chart(fig_segment, use_container_width=True)
+        st.plotly_chart(segment_chart(filters), use_container_width=True)
 
     # Product Performance
     st.subheader("📦 Product Performance Analysis")
@@ -254,38 +720,12 @@ if not filtered_df.empty:
     with col1:
         # Top 10 Products by Sales
         st.write("**Top 10 Products by Sales**")
-        top_products = filtered_df.groupby('Product Name')['Sales'].sum().nlargest(10).reset_index()
-        fig_top_products = px.bar(
-            top_products, 
-            x='Sales', 
-            y='Product Name',
-            orientation='h',
-            color='Sales',
-            color_continuous_scale='Blues'
-        )
-        fig_top_products.update_layout(showlegend=False, height=400)
-        st.plotly_chart(fig_top_products, use_container_width=True)
+        st.plotly_chart(product_chart(filters), use_container_width=True)
     
     with col2:
         # Sub-Category Performance
         st.write("**Sub-Category Performance**")
-        subcat_data = filtered_df.groupby('Sub-Category').agg({
-            'Sales': 'sum',
-            'Profit': 'sum'
-        }).reset_index()
-        subcat_data['Profit Margin'] = (subcat_data['Profit'] / subcat_data['Sales']) * 100
-        
-        fig_subcat = px.scatter(
-            subcat_data, 
-            x='Sales', 
-            y='Profit',
-            size='Sales',
-            color='Profit Margin',
-            hover_name='Sub-Category',
-            color_continuous_scale='RdYlBu'
-        )
-        fig_subcat.update_layout(height=400)
-        st.plotly_chart(fig_subcat, use_container_width=True)
+        st.plotly_chart(subcat_chart(filters), use_container_width=True)
 
     # Shipping Analysis
     st.subheader("🚚 Shipping Analysis")
@@ -294,33 +734,11 @@ if not filtered_df.empty:
     
     with col1:
         # Ship Mode Distribution
-        ship_mode_data = filtered_df.groupby('Ship Mode').agg({
-            'Order ID': 'nunique',
-            'Sales': 'sum'
-        }).reset_index()
-        
-        fig_ship = px.pie(
-            ship_mode_data, 
-            values='Order ID', 
-            names='Ship Mode',
-            title="Orders by Ship Mode"
-        )
-        st.plotly_chart(fig_ship, use_container_width=True)
+        st.plotly_chart(ship_mode_chart(filters), use_container_width=True)
     
     with col2:
         # Shipping Time Analysis
-        filtered_df['Shipping Days'] = (filtered_df['Ship Date'] - filtered_df['Order Date']).dt.days
-        ship_time = filtered_df.groupby('Ship Mode')['Shipping Days'].mean().reset_index()
-        
-        fig_ship_time = px.bar(
-            ship_time, 
-            x='Ship Mode', 
-            y='Shipping Days',
-            color='Shipping Days',
-            color_continuous_scale='Reds',
-            title="Average Shipping Days by Mode"
-        )
-        st.plotly_chart(fig_ship_time, use_container_width=True)
+        st.plotly_chart(ship_time_chart(filters), use_container_width=True)
 
     # Customer Insights
     st.subheader("👤 Customer Insights")
@@ -329,55 +747,17 @@ if not filtered_df.empty:
     
     with col1:
         # Top 10 Customers by Sales
-        customer_sales = filtered_df.groupby('Customer Name')['Sales'].sum().nlargest(10).reset_index()
-        fig_customers = px.bar(
-            customer_sales, 
-            x='Sales', 
-            y='Customer Name',
-            orientation='h',
-            color='Sales',
-            color_continuous_scale='Greens',
-            title="Top 10 Customers by Sales"
-        )
-        fig_customers.update_layout(showlegend=False, height=400)
-        st.plotly_chart(fig_customers, use_container_width=True)
+        st.plotly_chart(customer_chart(filters), use_container_width=True)
     
     with col2:
         # Customer Distribution by Segment and Region
-        customer_dist = filtered_df.groupby(['Segment', 'Region'])['Customer ID'].nunique().reset_index()
-        fig_cust_dist = px.sunburst(
-            customer_dist, 
-            path=['Segment', 'Region'], 
-            values='Customer ID',
-            title="Customer Distribution"
-        )
-        st.plotly_chart(fig_cust_dist, use_container_width=True)
+        st.plotly_chart(customer_dist_chart(filters), use_container_width=True)
 
     # Location Analysis
     st.subheader("📍 Location Analysis")
     
-    # City-wise analysis
-    city_data = filtered_df.groupby(['State', 'City']).agg({
-        'Sales': 'sum',
-        'Profit': 'sum',
-        'Order ID': 'nunique'
-    }).reset_index()
-    
     # Top cities by sales
-    top_cities = city_data.nlargest(15, 'Sales')
-    top_cities['Location'] = top_cities['City'] + ', ' + top_cities['State']
-    
-    fig_cities = px.bar(
-        top_cities, 
-        x='Sales', 
-        y='Location',
-        orientation='h',
-        color='Profit',
-        color_continuous_scale='RdYlGn',
-        title="Top 15 Cities by Sales"
-    )
-    fig_cities.update_layout(height=500)
-    st.plotly_chart(fig_cities, use_container_width=True)
+    st.plotly_chart(city_chart(filters), use_container_width=True)
 
     # Export Data Section
     st.subheader("📥 Export Data")
@@ -386,37 +766,27 @@ if not filtered_df.empty:
     
     with col1:
         # Export filtered data as CSV
-        csv = filtered_df.to_csv(index=False)
         st.download_button(
             label="📄 Download Filtered Data as CSV",
-            data=csv,
+            data=lambda: filtered_csv(filters),
             file_name=f'superstore_filtered_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv',
             mime='text/csv'
         )
     
     with col2:
         # Export summary statistics
-        summary_stats = filtered_df.describe()
-        summary_csv = summary_stats.to_csv()
         st.download_button(
             label="📊 Download Summary Statistics",
-            data=summary_csv,
+            data=lambda: summary_csv(filters),
             file_name=f'superstore_summary_stats_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv',
             mime='text/csv'
         )
     
     with col3:
         # Export aggregated data
-        agg_data = filtered_df.groupby(['Category', 'Sub-Category', 'Region']).agg({
-            'Sales': 'sum',
-            'Profit': 'sum',
-            'Quantity': 'sum',
-            'Order ID': 'nunique'
-        }).reset_index()
-        agg_csv = agg_data.to_csv(index=False)
         st.download_button(
             label="📈 Download Aggregated Data",
-            data=agg_csv,
+            data=lambda: aggregated_csv(filters),
             file_name=f'superstore_aggregated_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv',
             mime='text/csv'
         )
@@ -424,13 +794,13 @@ if not filtered_df.empty:
     # Data Table
     st.subheader("📋 Filtered Data Preview")
     st.dataframe(
-        filtered_df.head(100),
+        filter_preview(filters),
         use_container_width=True,
         height=400
     )
     
     # Show total records
-    st.info(f"Showing first 100 rows of {len(filtered_df):,} total filtered records")
+    st.info(f"Showing first 100 rows of {record_count:,} total filtered records")
 
 else:
     st.warning("No data available for the selected filters. Please adjust your filter criteria.")